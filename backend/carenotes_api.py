@@ -1,62 +1,424 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, RedirectResponse
+from fastapi.routing import APIRoute
+from brotli_asgi import BrotliMiddleware
+import msgspec
 import sqlite3
+import queue
+import threading
+import inspect
+import logging
+from contextlib import contextmanager
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
+import zlib
 
-# Initialize FastAPI app
-app = FastAPI()
+# Per-request diagnostics are logged at DEBUG so they cost nothing when the
+# server runs at the default WARNING level.
+logger = logging.getLogger(__name__)
+
+# Initialize FastAPI app (responses are encoded with orjson)
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Compress responses over 1KB with Brotli, falling back to gzip for clients
+# that do not accept `br`
+app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True)
 
 # Serve static files (Frontend)
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
-def get_db_connection():
-    """Establishes a connection to the SQLite database.
+DB_PATH = "db/carenotes.db"
+
+# SQLite in WAL mode allows one writer alongside any number of readers, so
+# writes share a single connection while reads get their own pool. Sync
+# handlers run in Starlette's threadpool; size the read pool to the number of
+# threads likely to query at once.
+WRITE_POOL_SIZE = 1
+READ_POOL_SIZE = max(4, (os.cpu_count() or 1) * 2)
+
+_write_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+
+# Per-connection tuning. journal_mode=WAL is persistent on the database file and
+# is set once in create_database; the rest must be applied to every connection.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Statements are kept as module constants so each pooled connection's
+# statement cache reuses the prepared statement across requests.
+# dateTime is stored as INTEGER epoch milliseconds; reads format it back to the
+# ISO-8601 string the API exposes (e.g. "2024-09-17T10:30:00.000Z") in SQLite.
+SQL_INSERT = "INSERT INTO notes (residentName, dateTime, content, authorName) VALUES (?, ?, ?, ?)"
+SQL_SELECT_ALL = (
+    "SELECT id, residentName, strftime('%Y-%m-%dT%H:%M:%fZ', dateTime / 1000.0, 'unixepoch') AS dateTime, "
+    "content, authorName FROM notes"
+)
+SQL_SELECT_BY_RESIDENT = SQL_SELECT_ALL + " WHERE residentName = ?"
+SQL_SELECT_VERSION = "SELECT token, version FROM notes_version"
+SQL_UPDATE = "UPDATE notes SET residentName = ?, dateTime = ?, content = ?, authorName = ? WHERE id = ? RETURNING id"
+SQL_DELETE = "DELETE FROM notes WHERE id = ? RETURNING id"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Range that format_datetime (and SQLite's strftime) can render back
+MIN_MILLIS = (datetime.min.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+MAX_MILLIS = (datetime.max.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+
+def parse_datetime(value):
+    """Converts an ISO-8601 timestamp to epoch milliseconds.
+
+    Timestamps without an offset are taken to be UTC.
+
+    Args:
+        value (str): The timestamp, e.g. "2024-09-17T10:30:00Z".
 
     Returns:
-        sqlite3.Connection: A connection object to interact with the SQLite database.
+        int: Milliseconds since the Unix epoch.
 
-    Example:
-        >>> conn = get_db_connection()
-        >>> cursor = conn.cursor()
+    Raises:
+        ValueError: If `value` is not a valid ISO-8601 timestamp, or falls
+            outside years 1-9999 once converted to UTC.
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    try:
+        parsed = parsed.astimezone(timezone.utc)
+    except OverflowError:
+        raise ValueError(f"{value!r} is outside years 1-9999 in UTC") from None
+    millis = (parsed - EPOCH) // timedelta(milliseconds=1)
+    if not MIN_MILLIS <= millis <= MAX_MILLIS:
+        raise ValueError(f"{value!r} is outside years 1-9999 in UTC")
+    return millis
+
+def format_datetime(millis):
+    """Formats epoch milliseconds as an ISO-8601 UTC string, e.g. "2024-09-17T10:30:00.000Z"."""
+    moment = EPOCH + timedelta(milliseconds=millis)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def open_connection(read_only=False):
+    """Opens a new connection to the SQLite database.
+
+    Args:
+        read_only (bool, optional): Reject writes on this connection via
+            `PRAGMA query_only`. Defaults to False.
+
+    Returns:
+        sqlite3.Connection: A connection usable from any thread, in autocommit mode.
     """
-    conn = sqlite3.connect("db/carenotes.db")
+    conn = sqlite3.connect(
+        DB_PATH, check_same_thread=False, isolation_level=None, cached_statements=256
+    )
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    if read_only:
+        conn.execute("PRAGMA query_only=1")
     return conn
 
+def init_pool(read_size=READ_POOL_SIZE, write_size=WRITE_POOL_SIZE):
+    """Fills the read and write pools with pre-opened connections."""
+    for _ in range(write_size):
+        _write_pool.put(open_connection())
+    for _ in range(read_size):
+        _read_pool.put(open_connection(read_only=True))
+
+def close_pool():
+    """Closes every idle connection in both pools."""
+    for pool in (_write_pool, _read_pool):
+        while not pool.empty():
+            pool.get_nowait().close()
+
+@contextmanager
+def acquire(read_only=False):
+    """Borrows a connection from the write pool (or the read pool) and returns it on exit.
+
+    Args:
+        read_only (bool, optional): Borrow a query-only connection so the
+            caller does not wait behind writers. Defaults to False.
+
+    Example:
+        >>> with acquire(read_only=True) as conn:
+        ...     cursor = conn.cursor()
+    """
+    pool = _read_pool if read_only else _write_pool
+    conn = pool.get()
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
+
+@contextmanager
+def transaction(conn, immediate=False):
+    """Runs the enclosed statements in a single transaction.
+
+    Connections are in autocommit mode, so batched writes must open the
+    transaction explicitly to get one commit (and one fsync) for the batch.
+
+    Args:
+        conn (sqlite3.Connection): The connection to run the transaction on.
+        immediate (bool, optional): Take the write lock up front with
+            `BEGIN IMMEDIATE`. Defaults to False.
+
+    Example:
+        >>> with acquire() as conn, transaction(conn):
+        ...     conn.executemany(...)
+    """
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+class PendingWrite:
+    """A batch of note rows queued for the background writer.
+
+    Attributes:
+        rows (list): `(residentName, dateTime, content, authorName)` tuples to insert.
+        ids (list): The assigned note IDs, in row order, once committed.
+        error (Optional[Exception]): The failure, if the batch was rolled back.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.ids = []
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self):
+        """Blocks until the rows are committed and returns their IDs.
+
+        Raises:
+            Exception: Whatever error caused the writer to roll back the batch.
+        """
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.ids
+
+
+class NoteWriter:
+    """Single background thread that inserts queued notes in batched transactions.
+
+    Callers enqueue rows and the writer commits whatever is already queued, up
+    to `batch_size` rows, in one `BEGIN IMMEDIATE ... COMMIT` without waiting
+    for more. A lone write is committed straight away; under load, writes that
+    arrive while a commit is running share the next one and its fsync instead
+    of contending for the SQLite write lock.
+
+    Example:
+        >>> writer = NoteWriter()
+        >>> writer.start()
+        >>> writer.write([("Alice Johnson", 1726569000000, "...", "Nurse Smith")])
+        [3]
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[PendingWrite]]" = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        """Starts the writer thread."""
+        self._thread = threading.Thread(target=self._run, name="note-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Commits anything still queued, then stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, rows):
+        """Queues rows for insertion and returns without waiting for the commit.
+
+        Returns:
+            PendingWrite: Handle whose `wait()` returns the assigned IDs.
+        """
+        pending = PendingWrite(rows)
+        self._queue.put(pending)
+        return pending
+
+    def write(self, rows):
+        """Queues rows for insertion and waits until they are committed.
+
+        Returns:
+            list: The IDs assigned to `rows`, in order.
+        """
+        return self.submit(rows).wait()
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                break
+            size = len(batch[0].rows)
+            while size < self.batch_size:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    running = False
+                    break
+                batch.append(pending)
+                size += len(pending.rows)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            with acquire() as conn, transaction(conn, immediate=True):
+                cursor = conn.cursor()
+                for pending in batch:
+                    for row in pending.rows:
+                        cursor.execute(SQL_INSERT, row)
+                        pending.ids.append(cursor.lastrowid)
+        except Exception as e:
+            logger.error("Note writer rolled back a batch of %d writes: %s", len(batch), e)
+            for pending in batch:
+                pending.ids = []
+                pending.error = e
+        for pending in batch:
+            pending.done.set()
+
+
+note_writer = NoteWriter()
+
+NOTES_TABLE = '''CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        residentName TEXT NOT NULL,
+                        dateTime INTEGER NOT NULL,
+                        content TEXT NOT NULL,
+                        authorName TEXT NOT NULL
+                    )'''
+
+def migrate_datetime_column(conn):
+    """Rebuilds a `notes` table whose `dateTime` column still holds ISO-8601 TEXT.
+
+    A TEXT column would coerce the epoch-millisecond integers back to strings,
+    so the table is copied into the INTEGER schema rather than updated in place.
+    Does nothing once the table has been migrated.
+
+    Raises:
+        RuntimeError: If any row's `dateTime` is rejected by `parse_datetime`.
+            Nothing is migrated; the offending note IDs are listed so they can be fixed.
+    """
+    columns = {row["name"]: row["type"] for row in conn.execute("PRAGMA table_info(notes)")}
+    if columns.get("dateTime", "").upper() != "TEXT":
+        return
+
+    invalid = []
+    for row in conn.execute("SELECT id, dateTime FROM notes"):
+        try:
+            parse_datetime(row["dateTime"])
+        except ValueError:
+            invalid.append(f"{row['id']} ({row['dateTime']!r})")
+    if invalid:
+        raise RuntimeError(
+            "Cannot migrate notes.dateTime to epoch milliseconds: notes with dateTime values "
+            f"that are not ISO-8601 or fall outside years 1-9999 in UTC: {', '.join(invalid)}. "
+            "Correct these rows and restart."
+        )
+
+    logger.info("Migrating notes.dateTime to INTEGER epoch milliseconds...")
+    conn.create_function("parse_datetime", 1, parse_datetime, deterministic=True)
+    with transaction(conn):
+        conn.execute("DROP TABLE IF EXISTS notes_migrated")
+        conn.execute(NOTES_TABLE.format(table="notes_migrated"))
+        conn.execute(
+            "INSERT INTO notes_migrated (id, residentName, dateTime, content, authorName) "
+            "SELECT id, residentName, parse_datetime(dateTime), content, authorName FROM notes"
+        )
+        # DROP TABLE forgets the AUTOINCREMENT high-water mark; keep it so IDs
+        # of deleted notes are never handed out again
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'notes'").fetchone()
+        conn.execute("DROP TABLE notes")
+        conn.execute("ALTER TABLE notes_migrated RENAME TO notes")
+        if sequence is not None:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'notes'")
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('notes', ?)", (sequence["seq"],))
+
 def create_database():
     """Creates the database and initializes tables if they do not exist."""
 
-    if not os.path.exists("db"):
-        os.makedirs("db")  # Ensure the 'db' directory exists
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)  # Ensure the 'db' directory exists
 
-    conn = get_db_connection()
+    conn = open_connection()
     cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
     
     # Ensure id is AUTO INCREMENT
-    cursor.execute('''CREATE TABLE IF NOT EXISTS notes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        residentName TEXT NOT NULL,
-                        dateTime TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        authorName TEXT NOT NULL
-                    )''')
+    cursor.execute(NOTES_TABLE.format(table="notes"))
+    migrate_datetime_column(conn)
+
+    # Covering index so the residentName filter is answered from the index alone
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notes_resident ON notes(residentName, id, dateTime, content, authorName)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_datetime ON notes(dateTime)")
+
+    # Single-row counter bumped by triggers on every write, used as the list
+    # ETag. The random token identifies this database file, so a recreated
+    # database whose counter restarts at 0 cannot match an older ETag.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS notes_version "
+        "(id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, token TEXT NOT NULL)"
+    )
+    columns = {row["name"] for row in cursor.execute("PRAGMA table_info(notes_version)")}
+    if "token" not in columns:
+        cursor.execute("ALTER TABLE notes_version ADD COLUMN token TEXT")
+        cursor.execute("UPDATE notes_version SET token = lower(hex(randomblob(8)))")
+    cursor.execute(
+        "INSERT OR IGNORE INTO notes_version (id, version, token) VALUES (1, 0, lower(hex(randomblob(8))))"
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS notes_version_after_{event.lower()} AFTER {event} ON notes "
+            "BEGIN UPDATE notes_version SET version = version + 1; END"
+        )
 
     # Check if records exist
-    cursor.execute("SELECT COUNT(*) FROM notes")
-    if cursor.fetchone()[0] == 0:
-        cursor.executemany("INSERT INTO notes (residentName, dateTime, content, authorName) VALUES (?, ?, ?, ?)", [
-            ("Alice Johnson", "2024-09-17T10:30:00Z", "Medication administered as scheduled.", "Nurse Smith"),
-            ("Bob Williams", "2024-09-17T11:45:00Z", "Assisted with physical therapy exercises.", "Dr. Brown")
-        ])
-    
-    conn.commit()
+    with transaction(conn):
+        cursor.execute("SELECT COUNT(*) FROM notes")
+        if cursor.fetchone()[0] == 0:
+            cursor.executemany(SQL_INSERT, [
+                ("Alice Johnson", parse_datetime("2024-09-17T10:30:00Z"), "Medication administered as scheduled.", "Nurse Smith"),
+                ("Bob Williams", parse_datetime("2024-09-17T11:45:00Z"), "Assisted with physical therapy exercises.", "Dr. Brown")
+            ])
+
     conn.close()
 
 
+def check_sync_note_routes():
+    """Ensures every `/notes` endpoint is a plain `def` function.
+
+    The note handlers make blocking sqlite3 calls. Declared with `def`, FastAPI
+    runs them in its threadpool; declared with `async def`, they would run on
+    the event loop thread and stall every other request while SQLite works.
+
+    Raises:
+        RuntimeError: If a `/notes` route is declared with `async def`.
+    """
+    for route in app.routes:
+        if (
+            isinstance(route, APIRoute)
+            and route.path.startswith("/notes")
+            and inspect.iscoroutinefunction(route.endpoint)
+        ):
+            raise RuntimeError(f"{route.path} must be a sync `def` handler: it blocks on sqlite3.")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Runs on application startup to initialize the database.
@@ -66,13 +428,25 @@ async def startup_event():
     Example:
         >>> startup_event()
     """
-    print("Initializing database...")
+    check_sync_note_routes()
+    logger.info("Initializing database...")
     create_database()
-    print("Database initialized successfully.")
+    init_pool()
+    note_writer.start()
+    logger.info("Database initialized successfully.")
 
-class Note(BaseModel):
+@app.on_event("shutdown")
+def shutdown_event():
+    """Flushes queued writes and closes the pooled connections on application shutdown."""
+    note_writer.stop()
+    close_pool()
+
+class Note(msgspec.Struct):
     """Schema for a Care Note object.
 
+    Request bodies are decoded and validated by msgspec (see `json_body`)
+    rather than Pydantic.
+
     Attributes:
         residentName (str): Name of the resident associated with the note.
         dateTime (str): The timestamp when the note was created.
@@ -85,104 +459,223 @@ class Note(BaseModel):
     authorName: str
 
 
-@app.post("/notes/create", response_model=Note)
-def create_note(note: Note):
+def json_body(type_):
+    """Builds a dependency that decodes the JSON request body into `type_`.
+
+    Args:
+        type_: The msgspec-compatible type to decode into, e.g. `Note` or `List[Note]`.
+
+    Returns:
+        Callable: A FastAPI dependency returning the decoded body.
+
+    Raises:
+        HTTPException: 422 if the body is not valid JSON or does not match `type_`.
+    """
+    async def decode(request: Request):
+        try:
+            return msgspec.json.decode(await request.body(), type=type_)
+        except msgspec.DecodeError as e:  # also covers msgspec.ValidationError
+            raise HTTPException(status_code=422, detail=str(e))
+    return decode
+
+
+def parse_note_datetime(note):
+    """Returns the note's `dateTime` as epoch milliseconds.
+
+    Raises:
+        HTTPException: 422 if `dateTime` is not a valid ISO-8601 timestamp.
+    """
+    try:
+        return parse_datetime(note.dateTime)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid dateTime: {str(e)}")
+
+
+# json_body() reads the raw request, so FastAPI cannot see the body type;
+# describe it to OpenAPI from the msgspec schema instead
+(NOTE_SCHEMA, NOTE_LIST_SCHEMA), NOTE_COMPONENTS = msgspec.json.schema_components(
+    [Note, List[Note]], ref_template="#/components/schemas/{name}"
+)
+
+def request_body(schema):
+    """Builds the `openapi_extra` documenting a JSON request body with `schema`."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+_default_openapi = app.openapi
+
+def openapi():
+    """Generates the OpenAPI schema, adding the msgspec components referenced by `request_body`."""
+    schema = _default_openapi()
+    schema.setdefault("components", {}).setdefault("schemas", {}).update(NOTE_COMPONENTS)
+    return schema
+
+app.openapi = openapi
+
+
+def msgspec_response(content):
+    """Encodes `content` with msgspec into a JSON response."""
+    return Response(content=msgspec.json.encode(content), media_type="application/json")
+
+
+# NOTE: the /notes handlers below are deliberately sync `def`, not `async def`.
+# sqlite3 blocks in C; FastAPI offloads sync handlers to its threadpool, whereas
+# an `async def` handler would block the event loop for every request.
+# check_sync_note_routes() enforces this at startup.
+
+@app.post("/notes/create", openapi_extra=request_body(NOTE_SCHEMA))
+def create_note(note: Note = Depends(json_body(Note))):
     """Creates a new care note in the database and returns the assigned ID.
 
     Args:
         note (Note): The care note containing residentName, dateTime, content, and authorName.
 
     Returns:
-        dict: The newly created note with its assigned `id`.
+        Response: The newly created note with its assigned `id`, encoded by msgspec.
 
     Raises:
-        HTTPException: If an internal error occurs while inserting the note.
+        HTTPException: If `dateTime` is invalid or an internal error occurs while inserting the note.
     """
+    date_time = parse_note_datetime(note)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO notes (residentName, dateTime, content, authorName) VALUES (?, ?, ?, ?)",
-            (note.residentName, note.dateTime, note.content, note.authorName),
-        )
-        new_id = cursor.lastrowid  # ✅ Get the newly assigned ID
-        conn.commit()
-        conn.close()
+        # Waits for the background writer to commit so the ID can be returned
+        [new_id] = note_writer.write([(note.residentName, date_time, note.content, note.authorName)])
 
-        return {
+        return msgspec_response({
             "id": new_id,  # ✅ Return the new note ID
             "residentName": note.residentName,
-            "dateTime": note.dateTime,
+            "dateTime": format_datetime(date_time),
             "content": note.content,
             "authorName": note.authorName,
-        }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@app.post("/notes/bulk_create", openapi_extra=request_body(NOTE_LIST_SCHEMA))
+def bulk_create_notes(notes: List[Note] = Depends(json_body(List[Note]))):
+    """Creates many care notes in a single transaction via the background writer.
+
+    Args:
+        notes (List[Note]): The care notes to insert.
+
+    Returns:
+        Response: The created notes with their assigned `id`s, in request order.
+
+    Raises:
+        HTTPException: If a `dateTime` is invalid or an internal error occurs while inserting the notes.
+    """
+    rows = [(note.residentName, parse_note_datetime(note), note.content, note.authorName) for note in notes]
+    try:
+        new_ids = note_writer.write(rows)
+
+        return msgspec_response([
+            {
+                "id": new_id,
+                "residentName": residentName,
+                "dateTime": format_datetime(date_time),
+                "content": content,
+                "authorName": authorName,
+            }
+            for new_id, (residentName, date_time, content, authorName) in zip(new_ids, rows)
+        ])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
+def notes_etag(token, version, residentName):
+    """Builds the weak ETag for a `/notes/list` response, e.g. `W/"3f9c2a1b0d4e5f67-42-all"`."""
+    scope = f"{zlib.crc32(residentName.encode()):08x}" if residentName else "all"
+    return f'W/"{token}-{version}-{scope}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Checks an `If-None-Match` header against `etag` using weak comparison."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
 @app.get("/notes/list")
-def list_notes(residentName: Optional[str] = Query(None)):
+def list_notes(request: Request, response: Response, residentName: Optional[str] = Query(None)):
     """Retrieves a list of care notes, ensuring the ID is correctly included.
 
+    The response carries a weak `ETag` derived from the notes version counter
+    and the filter; a request whose `If-None-Match` still matches gets an
+    empty 304 instead of the full list.
+
     Args:
         residentName (Optional[str], optional): The name of the resident to filter by. Defaults to None.
 
     Returns:
-        List[dict]: A list of notes including their IDs.
+        List[dict]: A list of notes including their IDs, or a 304 `Response`.
 
     Raises:
         HTTPException: If no notes are found or an internal error occurs.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with acquire(read_only=True) as conn:
+            cursor = conn.cursor()
 
-        if residentName:
-            cursor.execute("SELECT id, residentName, dateTime, content, authorName FROM notes WHERE residentName = ?", (residentName,))
-        else:
-            cursor.execute("SELECT id, residentName, dateTime, content, authorName FROM notes")
+            # Read the version before the rows: a write landing in between
+            # only makes the ETag older than the body, never newer.
+            cursor.execute(SQL_SELECT_VERSION)
+            token, version = cursor.fetchone()
+            etag = notes_etag(token, version, residentName)
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
 
-        notes = cursor.fetchall()
-        conn.close()
+            if residentName:
+                cursor.execute(SQL_SELECT_BY_RESIDENT, (residentName,))
+            else:
+                cursor.execute(SQL_SELECT_ALL)
+
+            notes = cursor.fetchall()
 
         if not notes:
-            print(" No notes found in database")
+            logger.debug("No notes found in database")
             raise HTTPException(status_code=404, detail="No notes found.")
 
-        # Convert rows to dict explicitly
-        result = [{"id": note["id"], "residentName": note["residentName"], "dateTime": note["dateTime"], "content": note["content"], "authorName": note["authorName"]} for note in notes]
+        # sqlite3.Row keys are the selected column names
+        result = [dict(note) for note in notes]
 
-        print(f" Retrieved {len(result)} notes from database: {result}")
+        logger.debug("Retrieved %d notes from database", len(result))
+        response.headers["ETag"] = etag
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f" Backend error retrieving notes: {str(e)}")
+        logger.error("Backend error retrieving notes: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-@app.put("/notes/update/{id}", response_model=Note)
-def update_note(id: int, note: Note):
+@app.put("/notes/update/{id}", openapi_extra=request_body(NOTE_SCHEMA))
+def update_note(id: int, note: Note = Depends(json_body(Note))):
     """Updates an existing care note."""
     
-    print(f"🛠️ Received UPDATE request for note ID: {id}")
+    logger.debug("Received UPDATE request for note ID: %s", id)
 
+    date_time = parse_note_datetime(note)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE notes SET residentName = ?, dateTime = ?, content = ?, authorName = ? WHERE id = ?",
-            (note.residentName, note.dateTime, note.content, note.authorName, id)
-        )
-        if cursor.rowcount == 0:
-            print(f" No note found with ID: {id}")
-            raise HTTPException(status_code=404, detail="Note not found.")
-        conn.commit()
-        conn.close()
-
-        print(f" Successfully updated note with ID: {id}")
-        return note
+        with acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                SQL_UPDATE,
+                (note.residentName, date_time, note.content, note.authorName, id)
+            )
+            # fetchall() runs the RETURNING statement to completion so the
+            # autocommit write is committed before the connection is pooled
+            if not cursor.fetchall():
+                logger.debug("No note found with ID: %s", id)
+                raise HTTPException(status_code=404, detail="Note not found.")
+
+        logger.debug("Successfully updated note with ID: %s", id)
+        return msgspec_response(msgspec.structs.replace(note, dateTime=format_datetime(date_time)))
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f" Error updating note: {str(e)}")
+        logger.error("Error updating note: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
@@ -190,47 +683,51 @@ def update_note(id: int, note: Note):
 def delete_note(id: int):
     """Deletes a care note from the database."""
 
-    print(f"🔍 Backend received DELETE request for ID: {id}")  # Debugging output
+    logger.debug("Backend received DELETE request for ID: %s", id)
 
     if id is None or id <= 0:
-        print(" Invalid ID received. Aborting delete.")
+        logger.debug("Invalid ID received. Aborting delete.")
         raise HTTPException(status_code=400, detail="Invalid note ID received")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM notes WHERE id = ?", (id,))
-        deleted_rows = cursor.rowcount
-        conn.commit()
-        conn.close()
-
-        if deleted_rows == 0:
-            print(f" No note found with ID: {id}")
+        with acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_DELETE, (id,))
+            deleted = cursor.fetchall()
+
+        if not deleted:
+            logger.debug("No note found with ID: %s", id)
             raise HTTPException(status_code=404, detail=f"Note with ID {id} not found.")
 
-        print(f"✅ Successfully deleted note with ID: {id}")
+        logger.debug("Successfully deleted note with ID: %s", id)
         return {"message": f"Note {id} deleted successfully."}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f" Error deleting note: {str(e)}")
+        logger.error("Error deleting note: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
 
+# Responses that never vary are built once and returned as-is
+_REDIRECT = RedirectResponse(url="/static/index.html", status_code=308)
+_NO_FAVICON = Response(status_code=204)
+
 @app.get("/")
 def root():
     """Redirects to the frontend index page.
 
     Returns:
-        RedirectResponse: Redirects the user to `/static/index.html`.
+        RedirectResponse: A permanent (308, browser-cacheable) redirect to `/static/index.html`.
     """
-    return RedirectResponse(url="/static/index.html")
+    return _REDIRECT
 
 @app.get("/favicon.ico")
 def favicon():
     """Handles missing favicon requests to prevent errors.
 
-    Raises:
-        HTTPException: Always returns a 404 error.
+    Returns:
+        Response: An empty 204 No Content response.
     """
-    raise HTTPException(status_code=404, detail="Favicon not found.")
+    return _NO_FAVICON